@@ -2,20 +2,18 @@ import argparse
 import logging
 from pathlib import Path
 from datetime import datetime, timezone
-from dateutil import parser as date_parser # Renamed to avoid conflict
 
 from src.parser import parse_network, parse_plans
 from src.splitter import (
     map_raw_to_node_actor,
-    map_raw_to_link_actor,
-    map_raw_to_car_actor,
+    build_link_actors,
+    build_car_actors,
     assign_resource_ids,
     split_and_save
 )
 from src.simulation_gen import generate_simulation_config
-from src.utils import logger, create_output_dir, generate_actor_id
+from src.utils import logger, create_output_dir
 from src.models import (
-    NODE_ACTOR_PREFIX, LINK_ACTOR_PREFIX, CAR_ACTOR_PREFIX,
     NODE_RESOURCE_PREFIX, LINK_RESOURCE_PREFIX, CAR_RESOURCE_PREFIX
 )
 
@@ -43,6 +41,8 @@ def main():
     ap.add_argument("--max-trips-per-file", type=int, default=1000, help="Maximum number of trips (cars) per JSON file.")
     ap.add_argument("--gzip", action="store_true", help="Save data files (.json.gz) compressed.")
     ap.add_argument("--pretty", action=argparse.BooleanOptionalAction, default=True, help="Save formatted (indented) JSON. Use --no-pretty to disable.")
+    ap.add_argument("--jobs", type=int, default=1, help="Worker processes for link/car actor construction (default: 1 = sequential).")
+    ap.add_argument("--cache-parsed", action="store_true", help="Cache parsed XML next to the input files and reuse it on repeat runs.")
     ap.add_argument("-v", "--verbose", action="store_true", help="Increase log level to DEBUG.")
 
     args = ap.parse_args()
@@ -60,14 +60,15 @@ def main():
              handler.setLevel(logging.INFO)
          logger.setLevel(logging.INFO)
 
-    # Validate timestamp
+    # Validate timestamp (stdlib fromisoformat accepts the 'Z' suffix on 3.11+;
+    # the replace keeps 3.10 working without pulling in dateutil)
     try:
-        parsed_time = date_parser.isoparse(args.start_real_time)
-        start_real_time_iso = parsed_time.isoformat(timespec='milliseconds')
+        parsed_time = datetime.fromisoformat(args.start_real_time.replace('Z', '+00:00'))
         # If no timezone, assume UTC (or local, but UTC is safer)
         if parsed_time.tzinfo is None:
              logger.warning(f"Timestamp '{args.start_real_time}' has no timezone. Assuming UTC.")
-             start_real_time_iso = datetime.fromisoformat(args.start_real_time).replace(tzinfo=timezone.utc).isoformat(timespec='milliseconds')
+             parsed_time = parsed_time.replace(tzinfo=timezone.utc)
+        start_real_time_iso = parsed_time.isoformat(timespec='milliseconds')
 
         logger.info(f"Using StartRealTime: {start_real_time_iso}")
     except ValueError:
@@ -82,8 +83,8 @@ def main():
     if not args.network.is_file(): logger.error(f"Network file not found: {args.network}"); exit(1)
     if not args.plans.is_file(): logger.error(f"Plans file not found: {args.plans}"); exit(1)
 
-    raw_nodes, raw_links, global_link_attrs = parse_network(args.network)
-    raw_trips = parse_plans(args.plans)
+    raw_nodes, raw_links, global_link_attrs = parse_network(args.network, use_cache=args.cache_parsed)
+    raw_trips = parse_plans(args.plans, use_cache=args.cache_parsed)
 
     if not raw_nodes: logger.warning("No nodes found in network file."); # Can continue, but generating links/cars will fail
     if not raw_links: logger.warning("No links found in network file.");
@@ -93,73 +94,45 @@ def main():
     logger.info("Mapping raw data to actors and assigning Resource IDs...")
 
     # 2.1 Nodes
-    initial_node_actors = [map_raw_to_node_actor(rn) for rn in raw_nodes]
-    node_id_map, final_node_actors = assign_resource_ids(
-        initial_node_actors, args.max_nodes_per_file, NODE_RESOURCE_PREFIX
+    # Resource IDs are a pure function of item position, so they come back as
+    # a position-aligned list zipped with the items — no id->resource dict.
+    node_resource_ids = assign_resource_ids(
+        len(raw_nodes), args.max_nodes_per_file, NODE_RESOURCE_PREFIX
     )
-    # Create a more useful map: original_id -> NodeActor (already with resource_id)
-    node_actor_map = {actor.id.split(';')[-1]: actor for actor in final_node_actors}
+    # Comprehensions keep the construction loop at C level (no per-item
+    # list.append lookup); the map is zipped from the original ids in order
+    final_node_actors = [
+        map_raw_to_node_actor(rn, resource_id)
+        for rn, resource_id in zip(raw_nodes, node_resource_ids)
+    ]
+    node_actor_map = dict(zip((rn.id for rn in raw_nodes), final_node_actors))
     logger.info(f"Resource IDs assigned to {len(final_node_actors)} nodes.")
 
     # 2.2 Links
-    initial_link_actors_pre_dep = [] # Temporary list before resolving dependencies
-    for rl in raw_links:
-         link_actor_id = generate_actor_id(LINK_ACTOR_PREFIX, rl.id)
-         # Create a temporary LinkActor ONLY for resource ID assignment
-         temp_link_actor = type('TempLink', (), {'id': link_actor_id, 'resource_id': None})()
-         initial_link_actors_pre_dep.append(temp_link_actor)
-
-    link_id_map, _ = assign_resource_ids(
-         initial_link_actors_pre_dep, args.max_links_per_file, LINK_RESOURCE_PREFIX
+    link_resource_ids = assign_resource_ids(
+        len(raw_links), args.max_links_per_file, LINK_RESOURCE_PREFIX
+    )
+    final_link_actors, link_actor_map = build_link_actors(
+        raw_links, global_link_attrs, node_actor_map, link_resource_ids, workers=args.jobs
     )
-
-    # Now create final LinkActors, resolving dependencies
-    final_link_actors = []
-    link_actor_map = {} # original_link_id -> LinkActor
-    for rl in raw_links:
-        original_link_id = rl.id
-        link_actor_id = generate_actor_id(LINK_ACTOR_PREFIX, original_link_id)
-        link_resource_id = link_id_map.get(original_link_id)
-        if not link_resource_id:
-             logger.error(f"Internal failure: Link {original_link_id} did not receive a resource ID.")
-             continue # Or handle error differently
-
-        link_actor = map_raw_to_link_actor(rl, global_link_attrs, node_actor_map, link_actor_id, link_resource_id)
-        final_link_actors.append(link_actor)
-        link_actor_map[original_link_id] = link_actor
     logger.info(f"Resource IDs assigned and dependencies resolved for {len(final_link_actors)} links.")
 
     # 2.3 Cars (Trips)
-    initial_car_actors_pre_dep = []
-    for rt in raw_trips:
-        car_actor_id = generate_actor_id(CAR_ACTOR_PREFIX, rt.name) # rt.name is the car ID
-        temp_car_actor = type('TempCar', (), {'id': car_actor_id, 'resource_id': None})()
-        initial_car_actors_pre_dep.append(temp_car_actor)
-
-    car_id_map, _ = assign_resource_ids(
-        initial_car_actors_pre_dep, args.max_trips_per_file, CAR_RESOURCE_PREFIX
+    car_resource_ids = assign_resource_ids(
+        len(raw_trips), args.max_trips_per_file, CAR_RESOURCE_PREFIX
+    )
+    # Cars are built lazily: split_and_save streams them straight to disk, so
+    # the full car list never materializes in memory (nodes and links must stay
+    # resident anyway, as the dependency maps reference them).
+    final_car_actors = build_car_actors(
+        raw_trips, node_actor_map, link_actor_map, car_resource_ids, workers=args.jobs
     )
-
-    final_car_actors = []
-    # car_actor_map = {} # original_trip_name -> CarActor (seems unnecessary)
-    for rt in raw_trips:
-        original_trip_name = rt.name
-        car_actor_id = generate_actor_id(CAR_ACTOR_PREFIX, original_trip_name)
-        car_resource_id = car_id_map.get(original_trip_name)
-        if not car_resource_id:
-             logger.error(f"Internal failure: Car/Trip {original_trip_name} did not receive a resource ID.")
-             continue
-
-        car_actor = map_raw_to_car_actor(rt, node_actor_map, link_actor_map, car_actor_id, car_resource_id)
-        final_car_actors.append(car_actor)
-        # car_actor_map[original_trip_name] = car_actor
-    logger.info(f"Resource IDs assigned and dependencies resolved for {len(final_car_actors)} cars.")
 
     # --- Step 3: Split and Save ---
     logger.info("Splitting actors into files and saving...")
-    node_files_info = split_and_save(final_node_actors, "nodes", scenario_output_dir, args.pretty, args.gzip)
-    link_files_info = split_and_save(final_link_actors, "links", scenario_output_dir, args.pretty, args.gzip)
-    car_files_info = split_and_save(final_car_actors, "cars", scenario_output_dir, args.pretty, args.gzip)
+    node_files_info = split_and_save(final_node_actors, "nodes", scenario_output_dir, args.pretty, args.gzip, workers=args.jobs)
+    link_files_info = split_and_save(final_link_actors, "links", scenario_output_dir, args.pretty, args.gzip, workers=args.jobs)
+    car_files_info = split_and_save(final_car_actors, "cars", scenario_output_dir, args.pretty, args.gzip, workers=args.jobs)
 
     # --- Step 4: Generate Configuration File ---
     generate_simulation_config(
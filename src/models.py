@@ -1,5 +1,5 @@
 import dataclasses
-from typing import List, Dict, Optional, Any
+from typing import List, Dict, Optional, Any, Tuple
 
 # Default prefixes for IDs
 NODE_ACTOR_PREFIX = "htcaid:node;"
@@ -18,62 +18,77 @@ LINK_STATE_TYPE = "model.mobility.entity.state.LinkState"
 CAR_STATE_TYPE = "model.mobility.entity.state.CarState"
 
 # Intermediate structures (after XML parsing)
-@dataclasses.dataclass
+@dataclasses.dataclass(slots=True)
 class RawNode:
     id: str
     x: str
     y: str
 
-@dataclasses.dataclass
-class RawLinkAttribute:
-    name: str
-    value: str
-
-@dataclasses.dataclass
+@dataclasses.dataclass(slots=True)
 class RawLink:
     id: str
     from_node: str
     to_node: str
-    length: str
-    freespeed: str
-    capacity: str
-    permlanes: str
+    length: float
+    freespeed: float
+    capacity: float
+    permlanes: float
+    lanes: int # Derived from permlanes at parse time
     oneway: str
-    modes: str
-    attributes: List[RawLinkAttribute] = dataclasses.field(default_factory=list)
+    modes: Tuple[str, ...] # Split/cleaned at parse time (shared per distinct value)
+    attributes: Dict[str, str] = dataclasses.field(default_factory=dict)
 
-@dataclasses.dataclass
+@dataclasses.dataclass(slots=True)
 class RawTrip:
     name: str # Used as the car ID
     origin_node: str
     destination_node: str
     link_origin: str
     count: str # Not used in the final JSON, but may be useful
-    start_time: str
+    start_tick: int # Parsed from the 'start' attribute (MATSim may use float times)
     mode: str
     # digital_rails_capable: str # Not used in the final JSON
 
 # Final structures (for JSON)
-@dataclasses.dataclass
+@dataclasses.dataclass(frozen=True, slots=True)
 class DependencyInfo:
     id: str
     resourceId: str
     classType: str
     actorType: str = "LoadBalancedDistributed"
 
-@dataclasses.dataclass
+    def to_json(self) -> Dict[str, Any]:
+        return {
+            'id': self.id,
+            'resourceId': self.resourceId,
+            'classType': self.classType,
+            'actorType': self.actorType,
+        }
+
+@dataclasses.dataclass(slots=True)
 class NodeContent:
     startTick: int = 0
     latitude: str = "" # Mapped from 'x'
     longitude: str = "" # Mapped from 'y'
     scheduleOnTimeManager: bool = False
 
-@dataclasses.dataclass
+    @classmethod
+    def _fast(cls, latitude: str, longitude: str) -> "NodeContent":
+        # Hot-path constructor: assigns every slot directly, skipping
+        # __init__'s keyword parsing and default machinery
+        self = cls.__new__(cls)
+        self.startTick = 0
+        self.latitude = latitude
+        self.longitude = longitude
+        self.scheduleOnTimeManager = False
+        return self
+
+@dataclasses.dataclass(slots=True)
 class NodeData:
     dataType: str = NODE_STATE_TYPE
     content: NodeContent = dataclasses.field(default_factory=NodeContent)
 
-@dataclasses.dataclass
+@dataclasses.dataclass(slots=True)
 class NodeActor:
     id: str
     name: str
@@ -83,7 +98,27 @@ class NodeActor:
     # Helper field to know in which file to save
     resource_id: Optional[str] = None
 
-@dataclasses.dataclass
+    def to_json(self) -> Dict[str, Any]:
+        # The whole fixed-shape payload is emitted in a single specialized
+        # builder (no per-level to_json hops) — this runs once per actor
+        content = self.data.content
+        return {
+            'id': self.id,
+            'name': self.name,
+            'typeActor': self.typeActor,
+            'data': {
+                'dataType': self.data.dataType,
+                'content': {
+                    'startTick': content.startTick,
+                    'latitude': content.latitude,
+                    'longitude': content.longitude,
+                    'scheduleOnTimeManager': content.scheduleOnTimeManager,
+                },
+            },
+            'dependencies': self.dependencies,
+        }
+
+@dataclasses.dataclass(slots=True)
 class LinkContent:
     startTick: int = 0
     from_node: str = "" # Will be filled with the node actor ID
@@ -96,21 +131,44 @@ class LinkContent:
     freeSpeed: float = 0.0
     capacity: float = 0.0
     permlanes: float = 0.0
-    modes: List[str] = dataclasses.field(default_factory=list)
+    modes: Tuple[str, ...] = () # Serialized as a JSON array like a list
     linkType: Optional[str] = None
     scheduleOnTimeManager: bool = False
 
-@dataclasses.dataclass
+    @classmethod
+    def _fast(cls, from_node: str, to_node: str, capperiod: Optional[str],
+              effectivecellsize: Optional[float], effectivelanewidth: Optional[float],
+              length: float, lanes: int, freeSpeed: float, capacity: float,
+              permlanes: float, modes: Tuple[str, ...], linkType: Optional[str]) -> "LinkContent":
+        # Hot-path constructor, same rationale as NodeContent._fast
+        self = cls.__new__(cls)
+        self.startTick = 0
+        self.from_node = from_node
+        self.to_node = to_node
+        self.capperiod = capperiod
+        self.effectivecellsize = effectivecellsize
+        self.effectivelanewidth = effectivelanewidth
+        self.length = length
+        self.lanes = lanes
+        self.freeSpeed = freeSpeed
+        self.capacity = capacity
+        self.permlanes = permlanes
+        self.modes = modes
+        self.linkType = linkType
+        self.scheduleOnTimeManager = False
+        return self
+
+@dataclasses.dataclass(slots=True)
 class LinkData:
     dataType: str = LINK_STATE_TYPE
     content: LinkContent = dataclasses.field(default_factory=LinkContent)
 
-@dataclasses.dataclass
+@dataclasses.dataclass(slots=True)
 class LinkDependencies:
     from_node: Optional[DependencyInfo] = None
     to_node: Optional[DependencyInfo] = None
 
-@dataclasses.dataclass
+@dataclasses.dataclass(slots=True)
 class LinkActor:
     id: str
     name: str
@@ -120,7 +178,47 @@ class LinkActor:
     # Helper field to know in which file to save
     resource_id: Optional[str] = None
 
-@dataclasses.dataclass
+    def to_json(self) -> Dict[str, Any]:
+        # Single specialized builder for the whole payload; optional content
+        # fields are only emitted when set, matching the old None filtering
+        content = self.data.content
+        c: Dict[str, Any] = {
+            'startTick': content.startTick,
+            'from_node': content.from_node,
+            'to_node': content.to_node,
+        }
+        if content.capperiod is not None:
+            c['capperiod'] = content.capperiod
+        if content.effectivecellsize is not None:
+            c['effectivecellsize'] = content.effectivecellsize
+        if content.effectivelanewidth is not None:
+            c['effectivelanewidth'] = content.effectivelanewidth
+        c['length'] = content.length
+        c['lanes'] = content.lanes
+        c['freeSpeed'] = content.freeSpeed
+        c['capacity'] = content.capacity
+        c['permlanes'] = content.permlanes
+        c['modes'] = content.modes
+        if content.linkType is not None:
+            c['linkType'] = content.linkType
+        c['scheduleOnTimeManager'] = content.scheduleOnTimeManager
+
+        deps = self.dependencies
+        d: Dict[str, Any] = {}
+        if deps.from_node is not None:
+            d['from_node'] = deps.from_node.to_json()
+        if deps.to_node is not None:
+            d['to_node'] = deps.to_node.to_json()
+
+        return {
+            'id': self.id,
+            'name': self.name,
+            'typeActor': self.typeActor,
+            'data': {'dataType': self.data.dataType, 'content': c},
+            'dependencies': d,
+        }
+
+@dataclasses.dataclass(slots=True)
 class CarContent:
     startTick: int = 0
     origin: str = "" # Will be filled with the node actor ID
@@ -129,23 +227,40 @@ class CarContent:
     gpsId: str = "htcaid:gps;1" # Will be filled with the GPS resource ID
     scheduleOnTimeManager: bool = True
 
-@dataclasses.dataclass
+    @classmethod
+    def _fast(cls, startTick: int, origin: str, destination: str, linkOrigin: str) -> "CarContent":
+        # Hot-path constructor, same rationale as NodeContent._fast
+        self = cls.__new__(cls)
+        self.startTick = startTick
+        self.origin = origin
+        self.destination = destination
+        self.linkOrigin = linkOrigin
+        self.gpsId = "htcaid:gps;1"
+        self.scheduleOnTimeManager = True
+        return self
+
+@dataclasses.dataclass(slots=True)
 class CarData:
     dataType: str = CAR_STATE_TYPE
     content: CarContent = dataclasses.field(default_factory=CarContent)
 
-@dataclasses.dataclass
+# The GPS dependency is identical for every car, so all CarDependencies share
+# one instance (it is only ever read) and serialization reuses one cached dict
+_GPS_DEP = DependencyInfo(
+    id="htcaid:gps;1",
+    resourceId="htcrid:gps;1",
+    classType="mobility.actor.GPS",
+    actorType="PoolDistributed"
+)
+_GPS_DEP_JSON = _GPS_DEP.to_json()
+
+@dataclasses.dataclass(slots=True)
 class CarDependencies: # Following the example, depends on origin/destination nodes
     from_node: Optional[DependencyInfo] = None # Represents the origin node
     to_node: Optional[DependencyInfo] = None   # Represents the destination node
-    gps: DependencyInfo = dataclasses.field(default_factory=lambda: DependencyInfo(
-        id="htcaid:gps;1",
-        resourceId="htcrid:gps;1",
-        classType="mobility.actor.GPS",
-        actorType="PoolDistributed"
-    )) # Represents the GPS resource
-
-@dataclasses.dataclass
+    gps: DependencyInfo = _GPS_DEP # Represents the GPS resource
+
+@dataclasses.dataclass(slots=True)
 class CarActor:
     id: str # Generated from the trip name
     name: str # Name based on the origin node (following example)
@@ -155,55 +270,37 @@ class CarActor:
     # Helper field to know in which file to save
     resource_id: Optional[str] = None
 
+    def to_json(self) -> Dict[str, Any]:
+        # Single specialized builder, reusing the shared GPS dict constant
+        content = self.data.content
+        deps = self.dependencies
+        d: Dict[str, Any] = {}
+        if deps.from_node is not None:
+            d['from_node'] = deps.from_node.to_json()
+        if deps.to_node is not None:
+            d['to_node'] = deps.to_node.to_json()
+        d['gps'] = _GPS_DEP_JSON if deps.gps is _GPS_DEP else deps.gps.to_json()
+        return {
+            'id': self.id,
+            'name': self.name,
+            'typeActor': self.typeActor,
+            'data': {
+                'dataType': self.data.dataType,
+                'content': {
+                    'startTick': content.startTick,
+                    'origin': content.origin,
+                    'destination': content.destination,
+                    'linkOrigin': content.linkOrigin,
+                    'gpsId': content.gpsId,
+                    'scheduleOnTimeManager': content.scheduleOnTimeManager,
+                },
+            },
+            'dependencies': d,
+        }
+
 # To store global attributes of links
-@dataclasses.dataclass
+@dataclasses.dataclass(slots=True)
 class GlobalLinkAttributes:
     capperiod: Optional[str] = None
     effectivecellsize: Optional[float] = None
     effectivelanewidth: Optional[float] = None
-
-# For the configuration file
-@dataclasses.dataclass
-class DataSourceInfo:
-    path: str
-
-@dataclasses.dataclass
-class DataSource:
-    sourceType: str = "json"
-    info: DataSourceInfo = dataclasses.field(default_factory=DataSourceInfo)
-
-@dataclasses.dataclass
-class ActorDataSource:
-    id: str # Resource ID
-    classType: str
-    dataSource: DataSource = dataclasses.field(default_factory=DataSource)
-
-@dataclasses.dataclass
-class SimulationConfig:
-    name: str
-    description: str
-    startRealTime: str
-    timeUnit: str
-    timeStep: int
-    duration: int
-    startTick: int
-    actorsDataSources: List[ActorDataSource] = dataclasses.field(default_factory=list)
-
-# Helper to convert dataclasses into dicts (removing None and auxiliary fields)
-def asdict_factory(data):
-    def convert_value(obj):
-        if isinstance(obj, list):
-            return [convert_value(i) for i in obj]
-        elif isinstance(obj, dict):
-            return {k: convert_value(v) for k, v in obj.items() if v is not None and k != 'resource_id'}
-        elif dataclasses.is_dataclass(obj):
-            # Ignore the auxiliary field resource_id during final serialization
-            return {k: convert_value(v) for k, v in dataclasses.asdict(obj).items() if v is not None and k != 'resource_id'}
-        else:
-            return obj
-    # Also filter Nones at the root level and the resource_id field
-    return {k: convert_value(v) for k, v in data if v is not None and k != 'resource_id'}
-
-def to_dict(obj):
-    """Converts a dataclass to a dictionary, recursively removing Nones."""
-    return dataclasses.asdict(obj, dict_factory=asdict_factory)
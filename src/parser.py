@@ -1,96 +1,234 @@
+import functools
+import hashlib
 import logging
-from typing import Tuple, List, Dict, Optional
+import pickle
+import sys
+from typing import Tuple, List, Dict, Optional, Any
 from lxml import etree
 from pathlib import Path
-from .models import RawNode, RawLink, RawTrip, RawLinkAttribute, GlobalLinkAttributes
+from .models import RawNode, RawLink, RawTrip, GlobalLinkAttributes
 
 logger = logging.getLogger(__name__)
 
-def parse_network(network_file: Path) -> Tuple[List[RawNode], List[RawLink], GlobalLinkAttributes]:
-    """Reads the MATSim network XML file and extracts nodes and links."""
+# Repeated attribute values (node ids referenced by many links, modes, oneway)
+# take a tiny set of distinct values; interning makes identical strings share
+# one object, cutting resident string memory on large networks.
+intern = sys.intern
+
+def _cache_path(input_file: Path) -> Path:
+    """Returns the cache file path for an input, keyed by its size and mtime.
+
+    Size+mtime is much cheaper than hashing gigabytes of XML and changes
+    whenever the file is rewritten, which is what matters for repeat runs.
+    """
+    stat = input_file.stat()
+    h = hashlib.blake2b(f"{stat.st_size}-{stat.st_mtime_ns}".encode()).hexdigest()[:16]
+    return input_file.with_name(f"{input_file.name}.parsed.{h}.pkl")
+
+
+def _load_cache(cache_file: Path) -> Optional[Any]:
+    if not cache_file.is_file():
+        return None
+    try:
+        with open(cache_file, 'rb') as f:
+            data = pickle.load(f)
+        logger.info(f"Loaded parsed data from cache: {cache_file}")
+        return data
+    except Exception as e:
+        logger.warning(f"Ignoring unreadable parse cache {cache_file}: {e}")
+        return None
+
+
+def _save_cache(cache_file: Path, data: Any):
+    try:
+        # Drop caches from older versions of the same input first
+        for stale in cache_file.parent.glob(f"{cache_file.name.rsplit('.', 2)[0]}.*.pkl"):
+            if stale != cache_file:
+                stale.unlink(missing_ok=True)
+        with open(cache_file, 'wb') as f:
+            pickle.dump(data, f, protocol=pickle.HIGHEST_PROTOCOL)
+        logger.info(f"Parsed data cached at: {cache_file}")
+    except Exception as e:
+        logger.warning(f"Could not write parse cache {cache_file}: {e}")
+
+
+@functools.lru_cache(maxsize=None)
+def _split_modes(modes: str) -> Tuple[str, ...]:
+    """Splits and cleans a MATSim modes attribute into a tuple of modes.
+
+    Networks carry a handful of distinct modes strings ("car", "car,bus", ...),
+    so memoizing by the raw attribute makes the split/strip/intern work run
+    once per distinct value instead of once per link.
+    """
+    # Interned so "car" from "car" and from "car,bus" share one object
+    return tuple(intern(m) for m in (part.strip() for part in modes.split(',')) if m)
+
+
+def _float_or_default(value, default: float, link_id: str, field: str) -> float:
+    """Converts a link attribute to float, falling back to a default with a warning."""
+    try:
+        return float(value)
+    except (ValueError, TypeError):
+        logger.warning(f"Link {link_id}: invalid {field} '{value}', using {default}")
+        return default
+
+def parse_network(network_file: Path, use_cache: bool = False) -> Tuple[List[RawNode], List[RawLink], GlobalLinkAttributes]:
+    """Reads the MATSim network XML file and extracts nodes and links.
+
+    With use_cache=True, the parsed result is pickled next to the input file
+    and reused on repeat runs while the input is unchanged.
+    """
     logger.info(f"Starting parsing of network file: {network_file}")
+    if use_cache:
+        cache_file = _cache_path(network_file)
+        cached = _load_cache(cache_file)
+        if cached is not None:
+            return cached
+
     nodes: List[RawNode] = []
     links: List[RawLink] = []
     global_attrs = GlobalLinkAttributes()
 
     try:
-        # Using iterparse for memory efficiency if needed, but getroot is simpler here
-        tree = etree.parse(str(network_file))
-        root = tree.getroot()
-
-        # Extract nodes
-        nodes_element = root.find('nodes')
-        if nodes_element is not None:
-            for node_elem in nodes_element.findall('node'):
-                node_id = node_elem.get('id')
-                x = node_elem.get('x')
-                y = node_elem.get('y')
+        # Stream with iterparse (like parse_plans) instead of materializing the
+        # whole DOM: for city-scale networks this keeps memory usage flat.
+        # The 'start' event on <links> lets us capture its global attributes
+        # before any <link> child is processed.
+        context = etree.iterparse(
+            str(network_file), events=('start', 'end'), tag=('node', 'link', 'nodes', 'links')
+        )
+        saw_nodes = False
+        saw_links = False
+
+        # Hoist hot-loop bindings to locals: each elem.get() is a Python->C
+        # call, and at millions of elements the lookups add up.
+        _RawNode = RawNode
+        _RawLink = RawLink
+        _nodes_append = nodes.append
+        _links_append = links.append
+
+        for event, elem in context:
+            if event == 'start':
+                if elem.tag == 'nodes':
+                    saw_nodes = True
+                elif elem.tag == 'links':
+                    saw_links = True
+                    # Global attributes live on the <links> tag itself
+                    global_attrs.capperiod = elem.get('capperiod')
+                    try:
+                        global_attrs.effectivecellsize = float(elem.get('effectivecellsize', '0.0'))
+                    except (ValueError, TypeError):
+                        logger.warning("Invalid value for 'effectivecellsize', using default 0.0")
+                        global_attrs.effectivecellsize = 0.0
+                    try:
+                        global_attrs.effectivelanewidth = float(elem.get('effectivelanewidth', '0.0'))
+                    except (ValueError, TypeError):
+                        logger.warning("Invalid value for 'effectivelanewidth', using default 0.0")
+                        global_attrs.effectivelanewidth = 0.0
+                continue
+
+            # 'end' events: element (and its children) fully parsed
+            if elem.tag == 'node':
+                # Read .attrib once instead of one .get() call per field
+                a = elem.attrib
+                node_id = a.get('id')
+                x = a.get('x')
+                y = a.get('y')
                 if node_id and x and y:
-                    nodes.append(RawNode(id=node_id, x=x, y=y))
+                    _nodes_append(_RawNode(id=intern(node_id), x=x, y=y))
+                else:
+                    # Log attributes + line only; etree.tostring would serialize
+                    # the whole subtree, which is pathological on bad inputs
+                    logger.warning(f"Node with missing data ignored (line {elem.sourceline}): {dict(a)}")
+
+            elif elem.tag == 'link':
+                a = elem.attrib
+                link_id = a.get('id')
+                from_node = a.get('from')
+                to_node = a.get('to')
+                length = a.get('length')
+                freespeed = a.get('freespeed')
+                capacity = a.get('capacity')
+                permlanes = a.get('permlanes')
+                oneway = a.get('oneway')
+                modes = a.get('modes')
+
+                if None in (link_id, from_node, to_node, length, freespeed, capacity, permlanes, oneway, modes):
+                    logger.warning(f"Link with missing attributes ignored: id={link_id}")
                 else:
-                    logger.warning(f"Node with missing data ignored: {etree.tostring(node_elem, encoding='unicode')}")
+                    # Convert numeric attributes once here (while the strings are
+                    # hot) instead of per-link in the link mapper
+                    try:
+                        length_f = float(length)
+                        freespeed_f = float(freespeed)
+                        capacity_f = float(capacity)
+                        permlanes_f = float(permlanes)
+                    except ValueError:
+                        # Rare path: re-convert per field so one bad attribute
+                        # does not discard the others
+                        length_f = _float_or_default(length, 0.0, link_id, 'length')
+                        freespeed_f = _float_or_default(freespeed, 0.0, link_id, 'freespeed')
+                        capacity_f = _float_or_default(capacity, 0.0, link_id, 'capacity')
+                        permlanes_f = _float_or_default(permlanes, 1.0, link_id, 'permlanes')
+
+                    try:
+                        lanes = int(permlanes_f)
+                    except (ValueError, OverflowError):
+                        logger.warning(f"Link {link_id}: cannot convert permlanes '{permlanes_f}' to int, using 1")
+                        lanes = 1
+
+                    raw_link = _RawLink(
+                        # Interned so the link_map probes per trip (link_origin
+                        # is interned in parse_plans) compare by pointer
+                        id=intern(link_id),
+                        from_node=intern(from_node),
+                        to_node=intern(to_node),
+                        length=length_f,
+                        freespeed=freespeed_f,
+                        capacity=capacity_f,
+                        permlanes=permlanes_f,
+                        lanes=lanes,
+                        oneway=intern(oneway),  # Might be useful for future logic, but not directly in final JSON
+                        modes=_split_modes(modes)
+                    )
+
+                    # Extract nested attributes as a dict (children are complete
+                    # on 'end'); downstream lookups become a single hash probe.
+                    # Direct child iteration skips the find/findall wrappers.
+                    for child in elem:
+                        if child.tag == 'attributes':
+                            link_attributes = raw_link.attributes
+                            for attr_elem in child:
+                                if attr_elem.tag != 'attribute':
+                                    continue
+                                name = attr_elem.get('name')
+                                value = attr_elem.text
+                                if name and value:
+                                    link_attributes[name] = value
+
+                    _links_append(raw_link)
+
+            elif elem.tag == 'links':
+                # End of the <links> block; nothing left to read from it
+                elem.clear()
+                continue
+
+            # Cleanup for iterparse: free the element and its already-consumed siblings
+            elem.clear()
+            while elem.getprevious() is not None:
+                del elem.getparent()[0]
+
+        if saw_nodes:
             logger.info(f"Found {len(nodes)} nodes.")
         else:
             logger.warning("<nodes> tag not found in network file.")
-
-        # Extract links and global attributes
-        links_element = root.find('links')
-        if links_element is not None:
-            # Get global attributes from the <links> tag
-            global_attrs.capperiod = links_element.get('capperiod')
-            try:
-                global_attrs.effectivecellsize = float(links_element.get('effectivecellsize', '0.0'))
-            except (ValueError, TypeError):
-                logger.warning("Invalid value for 'effectivecellsize', using default 0.0")
-                global_attrs.effectivecellsize = 0.0
-            try:
-                global_attrs.effectivelanewidth = float(links_element.get('effectivelanewidth', '0.0'))
-            except (ValueError, TypeError):
-                logger.warning("Invalid value for 'effectivelanewidth', using default 0.0")
-                global_attrs.effectivelanewidth = 0.0
-
-            for link_elem in links_element.findall('link'):
-                link_id = link_elem.get('id')
-                from_node = link_elem.get('from')
-                to_node = link_elem.get('to')
-                length = link_elem.get('length')
-                freespeed = link_elem.get('freespeed')
-                capacity = link_elem.get('capacity')
-                permlanes = link_elem.get('permlanes')
-                oneway = link_elem.get('oneway')
-                modes = link_elem.get('modes')
-
-                if not all([link_id, from_node, to_node, length, freespeed, capacity, permlanes, oneway, modes]):
-                    logger.warning(f"Link with missing attributes ignored: id={link_id}")
-                    continue
-
-                raw_link = RawLink(
-                    id=link_id,
-                    from_node=from_node,
-                    to_node=to_node,
-                    length=length,
-                    freespeed=freespeed,
-                    capacity=capacity,
-                    permlanes=permlanes,
-                    oneway=oneway,  # Might be useful for future logic, but not directly in final JSON
-                    modes=modes
-                )
-
-                # Extract nested attributes
-                attributes_element = link_elem.find('attributes')
-                if attributes_element is not None:
-                    for attr_elem in attributes_element.findall('attribute'):
-                        name = attr_elem.get('name')
-                        value = attr_elem.text
-                        cls = attr_elem.get('class')  # Not directly used, but could be useful
-                        if name and value:
-                            raw_link.attributes.append(RawLinkAttribute(name=name, value=value))
-
-                links.append(raw_link)
+        if saw_links:
             logger.info(f"Found {len(links)} links.")
         else:
             logger.warning("<links> tag not found in network file.")
 
+        if use_cache:
+            _save_cache(cache_file, (nodes, links, global_attrs))
         return nodes, links, global_attrs
 
     except etree.XMLSyntaxError as e:
@@ -100,9 +238,18 @@ def parse_network(network_file: Path) -> Tuple[List[RawNode], List[RawLink], Glo
         logger.error(f"Unexpected error while processing {network_file}: {e}")
         raise
 
-def parse_plans(plans_file: Path) -> List[RawTrip]:
-    """Reads the MATSim plans/trips XML file and extracts the trips."""
+def parse_plans(plans_file: Path, use_cache: bool = False) -> List[RawTrip]:
+    """Reads the MATSim plans/trips XML file and extracts the trips.
+
+    Supports the same opt-in parse cache as parse_network.
+    """
     logger.info(f"Starting parsing of plans/trips file: {plans_file}")
+    if use_cache:
+        cache_file = _cache_path(plans_file)
+        cached = _load_cache(cache_file)
+        if cached is not None:
+            return cached
+
     trips: List[RawTrip] = []
 
     try:
@@ -112,19 +259,24 @@ def parse_plans(plans_file: Path) -> List[RawTrip]:
 
         context = etree.iterparse(str(plans_file), events=('end',), tag='trip')
 
+        # Hoist hot-loop bindings to locals (same rationale as parse_network)
+        _RawTrip = RawTrip
+        _trips_append = trips.append
+
         for event, elem in context:
-            trip_name = elem.get('name')
-            origin_node = elem.get('origin')  # In MATSim, 'origin' and 'destination' can be links or facility IDs
-                                              # Assuming they are NODE IDs for the output format
-            destination_node = elem.get('destination')
-            link_origin = elem.get('link_origin')  # ID of the link where the vehicle starts
-            count = elem.get('count', '1')  # Number of trips (not used in your output format)
-            start_time = elem.get('start')
-            mode = elem.get('mode')
-            # digital_rails = elem.get('digital_rails_capable')  # Ignored
+            a = elem.attrib
+            trip_name = a.get('name')
+            origin_node = a.get('origin')  # In MATSim, 'origin' and 'destination' can be links or facility IDs
+                                           # Assuming they are NODE IDs for the output format
+            destination_node = a.get('destination')
+            link_origin = a.get('link_origin')  # ID of the link where the vehicle starts
+            count = a.get('count', '1')  # Number of trips (not used in your output format)
+            start_time = a.get('start')
+            mode = a.get('mode')
+            # digital_rails = a.get('digital_rails_capable')  # Ignored
 
             # Basic validation
-            if not all([trip_name, origin_node, destination_node, link_origin, start_time, mode]):
+            if None in (trip_name, origin_node, destination_node, link_origin, start_time, mode):
                 logger.warning(f"Trip with missing attributes ignored: name={trip_name}")
                 elem.clear()  # Free memory
                 # The following lines are important for iterparse
@@ -134,14 +286,21 @@ def parse_plans(plans_file: Path) -> List[RawTrip]:
 
             # Only add if the mode is 'car' (or another relevant mode in the future)
             if mode and 'car' in mode.lower():  # Check if 'car' is in the mode list
-                trips.append(RawTrip(
+                # Convert the start time here, like the link numerics
+                try:
+                    start_tick = int(float(start_time))  # MATSim may use float for time
+                except ValueError:
+                    logger.warning(f"Invalid start time '{start_time}' for trip {trip_name}, using 0.")
+                    start_tick = 0
+
+                _trips_append(_RawTrip(
                     name=trip_name,
-                    origin_node=origin_node,
-                    destination_node=destination_node,
-                    link_origin=link_origin,
+                    origin_node=intern(origin_node),
+                    destination_node=intern(destination_node),
+                    link_origin=intern(link_origin),
                     count=count,
-                    start_time=start_time,
-                    mode=mode
+                    start_tick=start_tick,
+                    mode=intern(mode)
                 ))
 
             # Cleanup for iterparse
@@ -150,6 +309,8 @@ def parse_plans(plans_file: Path) -> List[RawTrip]:
                 del elem.getparent()[0]
 
         logger.info(f"Found {len(trips)} car trips.")
+        if use_cache:
+            _save_cache(cache_file, trips)
         return trips
 
     except etree.XMLSyntaxError as e:
@@ -1,7 +1,12 @@
+import functools
+import itertools
 import logging
 import math
+import sys
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import List, Dict, Tuple, Any
+from typing import Iterable, Iterator, List, Dict, Optional, Tuple, Any
 from .models import (
     RawNode, RawLink, RawTrip, GlobalLinkAttributes,
     NodeActor, NodeContent, NodeData,
@@ -9,90 +14,97 @@ from .models import (
     CarActor, CarContent, CarData, CarDependencies,
     NODE_ACTOR_PREFIX, LINK_ACTOR_PREFIX, CAR_ACTOR_PREFIX,
     NODE_RESOURCE_PREFIX, LINK_RESOURCE_PREFIX, CAR_RESOURCE_PREFIX,
-    NODE_CLASS_TYPE, LINK_CLASS_TYPE, CAR_CLASS_TYPE,
-    to_dict
+    NODE_CLASS_TYPE, LINK_CLASS_TYPE, CAR_CLASS_TYPE
 )
-from .utils import save_json, chunk_list, generate_resource_id, generate_actor_id, logger
+from .utils import JsonArrayWriter, save_json_stream, chunk_iter, generate_resource_id, generate_actor_id, logger
 
 # --- Mapeamento e Conversão ---
 
-def map_raw_to_node_actor(raw_node: RawNode) -> NodeActor:
-    """Converte RawNode para NodeActor (sem resource_id ainda)."""
+@functools.lru_cache(maxsize=None)
+def _node_dependency(actor_id: str, resource_id: str) -> DependencyInfo:
+    """Dependência de nó compartilhada entre todos os links/carros que a referenciam.
+
+    Cada nó aparece como endpoint de muitos links e viagens; como DependencyInfo
+    é frozen, uma única instância por nó pode ser reutilizada por referência,
+    reduzindo as alocações de O(2·links + 2·viagens) para O(nós).
+    """
+    return DependencyInfo(id=actor_id, resourceId=resource_id, classType=NODE_CLASS_TYPE)
+
+
+def map_raw_to_node_actor(raw_node: RawNode, resource_id: Optional[str] = None) -> NodeActor:
+    """Converte RawNode para NodeActor."""
     actor_id = generate_actor_id(NODE_ACTOR_PREFIX, raw_node.id)
     return NodeActor(
         id=actor_id,
         name=f"Node{raw_node.id}",
-        data=NodeData(content=NodeContent(latitude=raw_node.x, longitude=raw_node.y))
+        data=NodeData(content=NodeContent._fast(raw_node.x, raw_node.y)),
+        resource_id=resource_id
     )
 
-def map_raw_to_link_actor(
-    raw_link: RawLink,
+def make_link_mapper(
     global_attrs: GlobalLinkAttributes,
-    node_map: Dict[str, NodeActor], # Mapa de original_node_id -> NodeActor (com resource_id)
-    link_actor_id: str,
-    link_resource_id: str # Recurso deste próprio link
-) -> LinkActor:
-    """Converte RawLink para LinkActor, resolvendo dependências."""
-    link_type = next((attr.value for attr in raw_link.attributes if attr.name == 'type'), None)
-    modes = [mode.strip() for mode in raw_link.modes.split(',') if mode.strip()]
-
-    from_node_actor = node_map.get(raw_link.from_node)
-    to_node_actor = node_map.get(raw_link.to_node)
-
-    if not from_node_actor or not from_node_actor.resource_id:
-        logger.warning(f"Nó de origem '{raw_link.from_node}' não encontrado ou sem resource_id para o link '{raw_link.id}'. Dependência ficará incompleta.")
-    if not to_node_actor or not to_node_actor.resource_id:
-        logger.warning(f"Nó de destino '{raw_link.to_node}' não encontrado ou sem resource_id para o link '{raw_link.id}'. Dependência ficará incompleta.")
-
-    # Criação das dependências
-    dependencies = LinkDependencies(
-        from_node=DependencyInfo(
-            id=from_node_actor.id,
-            resourceId=from_node_actor.resource_id,
-            classType=NODE_CLASS_TYPE
-        ) if from_node_actor and from_node_actor.resource_id else None,
-        to_node=DependencyInfo(
-            id=to_node_actor.id,
-            resourceId=to_node_actor.resource_id,
-            classType=NODE_CLASS_TYPE
-        ) if to_node_actor and to_node_actor.resource_id else None
-    )
+    node_map: Dict[str, NodeActor] # Mapa de original_node_id -> NodeActor (com resource_id)
+):
+    """Especializa o mapeador RawLink -> LinkActor para uma execução.
 
-    # Tratamento de tipos e valores padrão
-    try: length = float(raw_link.length)
-    except (ValueError, TypeError): length = 0.0; logger.warning(f"Link {raw_link.id}: Comprimento inválido '{raw_link.length}', usando 0.0")
-    try: free_speed = float(raw_link.freespeed)
-    except (ValueError, TypeError): free_speed = 0.0; logger.warning(f"Link {raw_link.id}: Velocidade livre inválida '{raw_link.freespeed}', usando 0.0")
-    try: capacity = float(raw_link.capacity)
-    except (ValueError, TypeError): capacity = 0.0; logger.warning(f"Link {raw_link.id}: Capacidade inválida '{raw_link.capacity}', usando 0.0")
-    try: permlanes = float(raw_link.permlanes)
-    except (ValueError, TypeError): permlanes = 1.0; logger.warning(f"Link {raw_link.id}: Permlanes inválido '{raw_link.permlanes}', usando 1.0")
-    try: lanes = int(permlanes)
-    except (ValueError, TypeError): lanes = 1; logger.warning(f"Link {raw_link.id}: Não foi possível converter permlanes '{permlanes}' para int, usando 1")
-
-
-    content = LinkContent(
-        from_node=from_node_actor.id if from_node_actor else f"MISSING_NODE_{raw_link.from_node}",
-        to_node=to_node_actor.id if to_node_actor else f"MISSING_NODE_{raw_link.to_node}",
-        capperiod=global_attrs.capperiod,
-        effectivecellsize=global_attrs.effectivecellsize,
-        effectivelanewidth=global_attrs.effectivelanewidth,
-        length=length,
-        lanes=lanes,
-        freeSpeed=free_speed,
-        capacity=capacity,
-        permlanes=permlanes,
-        modes=modes,
-        linkType=link_type
-    )
+    Os atributos globais são constantes da execução inteira: em vez de lê-los
+    de global_attrs por link, a closure os captura uma vez (avaliação parcial)
+    e o corpo quente só faz LOAD de locais/células — sem acessos a atributos
+    nem lookups globais por chamada.
+    """
+    capperiod = global_attrs.capperiod
+    effectivecellsize = global_attrs.effectivecellsize
+    effectivelanewidth = global_attrs.effectivelanewidth
+    node_get = node_map.get
+    _intern = sys.intern
 
-    return LinkActor(
-        id=link_actor_id,
-        name=f"Client{raw_link.id}", # Follow example
-        data=LinkData(content=content),
-        dependencies=dependencies,
-        resource_id=link_resource_id # Add the resource_id to the linst actor itself
-    )
+    def map_link(raw_link: RawLink, link_actor_id: str, link_resource_id: str) -> LinkActor:
+        """Converte RawLink para LinkActor, resolvendo dependências."""
+        # Interned: link types take a handful of distinct values across the
+        # whole network; modes arrive already split/cleaned from the parser
+        link_type = _intern(raw_link.attributes['type']) if 'type' in raw_link.attributes else None
+
+        from_node_actor = node_get(raw_link.from_node)
+        to_node_actor = node_get(raw_link.to_node)
+
+        if not from_node_actor or not from_node_actor.resource_id:
+            logger.warning(f"Nó de origem '{raw_link.from_node}' não encontrado ou sem resource_id para o link '{raw_link.id}'. Dependência ficará incompleta.")
+        if not to_node_actor or not to_node_actor.resource_id:
+            logger.warning(f"Nó de destino '{raw_link.to_node}' não encontrado ou sem resource_id para o link '{raw_link.id}'. Dependência ficará incompleta.")
+
+        # Criação das dependências (instâncias compartilhadas por nó)
+        dependencies = LinkDependencies(
+            from_node=_node_dependency(from_node_actor.id, from_node_actor.resource_id)
+            if from_node_actor and from_node_actor.resource_id else None,
+            to_node=_node_dependency(to_node_actor.id, to_node_actor.resource_id)
+            if to_node_actor and to_node_actor.resource_id else None
+        )
+
+        # Valores numéricos já convertidos no parse_network (incluindo lanes)
+        content = LinkContent._fast(
+            from_node_actor.id if from_node_actor else f"MISSING_NODE_{raw_link.from_node}",
+            to_node_actor.id if to_node_actor else f"MISSING_NODE_{raw_link.to_node}",
+            capperiod,
+            effectivecellsize,
+            effectivelanewidth,
+            raw_link.length,
+            raw_link.lanes,
+            raw_link.freespeed,
+            raw_link.capacity,
+            raw_link.permlanes,
+            raw_link.modes,
+            link_type
+        )
+
+        return LinkActor(
+            id=link_actor_id,
+            name=f"Client{raw_link.id}", # Follow example
+            data=LinkData(content=content),
+            dependencies=dependencies,
+            resource_id=link_resource_id # Add the resource_id to the linst actor itself
+        )
+
+    return map_link
 
 def map_raw_to_car_actor(
     raw_trip: RawTrip,
@@ -113,31 +125,20 @@ def map_raw_to_car_actor(
     if not origin_link_actor:
          logger.warning(f"Link de origem '{raw_trip.link_origin}' não encontrado para a viagem '{raw_trip.name}'. Campo linkOrigin ficará incompleto.")
 
-    # Criação das dependências (baseado no exemplo, apenas nós)
+    # Criação das dependências (baseado no exemplo, apenas nós; instâncias
+    # compartilhadas por nó)
     dependencies = CarDependencies(
-         from_node=DependencyInfo(
-            id=origin_node_actor.id,
-            resourceId=origin_node_actor.resource_id,
-            classType=NODE_CLASS_TYPE
-        ) if origin_node_actor and origin_node_actor.resource_id else None,
-        to_node=DependencyInfo(
-            id=destination_node_actor.id,
-            resourceId=destination_node_actor.resource_id,
-            classType=NODE_CLASS_TYPE
-        ) if destination_node_actor and destination_node_actor.resource_id else None
+        from_node=_node_dependency(origin_node_actor.id, origin_node_actor.resource_id)
+        if origin_node_actor and origin_node_actor.resource_id else None,
+        to_node=_node_dependency(destination_node_actor.id, destination_node_actor.resource_id)
+        if destination_node_actor and destination_node_actor.resource_id else None
     )
 
-    try:
-        start_tick = int(float(raw_trip.start_time)) # MATSim pode usar float para tempo
-    except (ValueError, TypeError):
-        logger.warning(f"Tempo de início inválido '{raw_trip.start_time}' para viagem {raw_trip.name}, usando 0.")
-        start_tick = 0
-
-    content = CarContent(
-        startTick=start_tick,
-        origin=origin_node_actor.id if origin_node_actor else f"MISSING_NODE_{raw_trip.origin_node}",
-        destination=destination_node_actor.id if destination_node_actor else f"MISSING_NODE_{raw_trip.destination_node}",
-        linkOrigin=origin_link_actor.id if origin_link_actor else f"MISSING_LINK_{raw_trip.link_origin}"
+    content = CarContent._fast(
+        raw_trip.start_tick, # Já convertido no parse_plans
+        origin_node_actor.id if origin_node_actor else f"MISSING_NODE_{raw_trip.origin_node}",
+        destination_node_actor.id if destination_node_actor else f"MISSING_NODE_{raw_trip.destination_node}",
+        origin_link_actor.id if origin_link_actor else f"MISSING_LINK_{raw_trip.link_origin}"
     )
 
     # Nome do Carro segue o exemplo estranho: Node<origin_id>
@@ -154,80 +155,292 @@ def map_raw_to_car_actor(
 
 # --- Divisão e Salvamento ---
 
-def assign_resource_ids(items: List[Any], max_per_file: int, resource_prefix: str) -> Tuple[Dict[str, str], List[Any]]:
+# --- Construção paralela de atores ---
+
+# Referência leve a um ator já construído: é só o que os mapeadores precisam
+# dos nós/links (id e resource_id), e é muito mais barato de serializar para
+# os processos workers do que o ator completo.
+ActorRef = namedtuple('ActorRef', ['id', 'resource_id'])
+
+# Estado somente-leitura de cada processo worker, preenchido pelo initializer
+_worker_state: Dict[str, Any] = {}
+
+
+def _init_mapping_worker(global_attrs, node_refs, link_refs):
+    _worker_state['global_attrs'] = global_attrs
+    _worker_state['node_refs'] = node_refs
+    _worker_state['link_refs'] = link_refs
+
+
+def _build_link_actor_chunk(chunk: List[Tuple[RawLink, str, str]]) -> List[LinkActor]:
+    # O mapeador especializado é construído uma vez por processo worker
+    map_link = _worker_state.get('link_mapper')
+    if map_link is None:
+        map_link = make_link_mapper(_worker_state['global_attrs'], _worker_state['node_refs'])
+        _worker_state['link_mapper'] = map_link
+    return [
+        map_link(raw_link, actor_id, resource_id)
+        for raw_link, actor_id, resource_id in chunk
+    ]
+
+
+def _build_car_actor_chunk(chunk: List[Tuple[RawTrip, str, str]]) -> List[CarActor]:
+    node_refs = _worker_state['node_refs']
+    link_refs = _worker_state['link_refs']
+    return [
+        map_raw_to_car_actor(raw_trip, node_refs, link_refs, actor_id, resource_id)
+        for raw_trip, actor_id, resource_id in chunk
+    ]
+
+
+def _node_refs_from_map(node_map: Dict[str, NodeActor]) -> Dict[str, ActorRef]:
+    return {oid: ActorRef(actor.id, actor.resource_id) for oid, actor in node_map.items()}
+
+
+def build_link_actors(
+    raw_links: List[RawLink],
+    global_attrs: GlobalLinkAttributes,
+    node_actor_map: Dict[str, NodeActor],
+    link_resource_ids: List[str],
+    workers: int = 1
+) -> Tuple[List[LinkActor], Dict[str, LinkActor]]:
+    """
+    Constrói os LinkActors finais, resolvendo dependências de nós.
+    link_resource_ids é a lista posicional vinda de assign_resource_ids.
+    Com workers > 1, divide o trabalho entre processos (a construção por item
+    é CPU-bound e independente). Retorna a lista de atores na ordem de entrada
+    e o mapa original_link_id -> LinkActor.
+    """
+    # Hoisted local: the lookup would otherwise run once per link
+    _gaid = generate_actor_id
+    tasks: List[Tuple[RawLink, str, str]] = [
+        (rl, _gaid(LINK_ACTOR_PREFIX, rl.id), resource_id)
+        for rl, resource_id in zip(raw_links, link_resource_ids)
+    ]
+
+    if workers > 1 and len(tasks) > 1:
+        node_refs = _node_refs_from_map(node_actor_map)
+        chunk_size = max(1, math.ceil(len(tasks) / (workers * 4)))
+        chunks = chunk_iter(tasks, chunk_size)
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_mapping_worker,
+            initargs=(global_attrs, node_refs, None)
+        ) as ex:
+            actors = list(itertools.chain.from_iterable(ex.map(_build_link_actor_chunk, chunks)))
+    else:
+        _map_link = make_link_mapper(global_attrs, node_actor_map)
+        actors = [
+            _map_link(rl, actor_id, resource_id)
+            for rl, actor_id, resource_id in tasks
+        ]
+
+    link_actor_map = {task[0].id: actor for task, actor in zip(tasks, actors)}
+    return actors, link_actor_map
+
+
+def build_car_actors(
+    raw_trips: List[RawTrip],
+    node_actor_map: Dict[str, NodeActor],
+    link_actor_map: Dict[str, LinkActor],
+    car_resource_ids: List[str],
+    workers: int = 1
+) -> Iterator[CarActor]:
+    """
+    Constrói os CarActors finais, resolvendo dependências de nós e links.
+    car_resource_ids é a lista posicional vinda de assign_resource_ids.
+    Com workers > 1, divide o trabalho entre processos como build_link_actors.
+
+    Gera os atores preguiçosamente: como nada mais precisa da lista completa
+    de carros, o chamador pode streamá-los direto para o disco sem nunca
+    materializar o conjunto inteiro em memória.
+    """
+    # Hoisted local, as in build_link_actors
+    _gaid = generate_actor_id
+    tasks: List[Tuple[RawTrip, str, str]] = [
+        (rt, _gaid(CAR_ACTOR_PREFIX, rt.name), resource_id)
+        for rt, resource_id in zip(raw_trips, car_resource_ids)
+    ]
+
+    if workers > 1 and len(tasks) > 1:
+        node_refs = _node_refs_from_map(node_actor_map)
+        link_refs = {oid: ActorRef(actor.id, actor.resource_id) for oid, actor in link_actor_map.items()}
+        chunk_size = max(1, math.ceil(len(tasks) / (workers * 4)))
+        chunks = chunk_iter(tasks, chunk_size)
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_mapping_worker,
+            initargs=(None, node_refs, link_refs)
+        ) as ex:
+            for chunk_actors in ex.map(_build_car_actor_chunk, chunks):
+                yield from chunk_actors
+        return
+
+    _map_car = map_raw_to_car_actor
+    for rt, actor_id, resource_id in tasks:
+        yield _map_car(rt, node_actor_map, link_actor_map, actor_id, resource_id)
+
+
+def assign_resource_ids(count: int, max_per_file: int, resource_prefix: str) -> List[str]:
     """
-    Atribui resource_id a cada item (NodeActor, LinkActor, CarActor)
-    e retorna um mapa de original_id -> resource_id e a lista de atores atualizada.
+    Atribui resource_ids posicionalmente: o item i recebe o resource_id do
+    arquivo (i // max_per_file) + 1. Retorna uma lista alinhada com a ordem de
+    entrada (count entradas), para ser zipada com os itens originais.
 
-    Assume que os itens já possuem um campo 'id' (actor_id) e um campo para o ID original
-    (implícito no mapeamento que será feito a partir do actor_id).
-    Precisa modificar os itens para adicionar o campo 'resource_id'.
+    Como o bucket é função pura da posição, não há por que manter um dicionário
+    de original_id -> resource_id: a lista guarda só uma referência por item a
+    um dos ~count/max_per_file resource_ids interned, e cada bucket é
+    preenchido em C via repetição de lista, sem aritmética por item.
     """
-    id_to_resource_map: Dict[str, str] = {}
-    updated_items: List[Any] = []
-    item_count = 0
-    file_index = 1
+    if max_per_file <= 0:
+        max_per_file = count or 1
 
-    for item in items:
-        if item_count >= max_per_file:
-            file_index += 1
-            item_count = 0
+    resource_ids: List[str] = []
+    for start in range(0, count, max_per_file):
+        resource_id = generate_resource_id(resource_prefix, (start // max_per_file) + 1)
+        resource_ids += [resource_id] * min(max_per_file, count - start)
+    return resource_ids
 
-        resource_id = generate_resource_id(resource_prefix, file_index)
-        item.resource_id = resource_id # Modifica o objeto ator diretamente
 
-        # Extrai o ID original do ID do ator para o mapa
-        # Ex: "dtmi:...:node;1001" -> "1001"
-        original_id = item.id.split(';')[-1]
-        id_to_resource_map[original_id] = resource_id
-        updated_items.append(item)
-        item_count += 1
+def _to_json_default(obj) -> Dict[str, Any]:
+    """Hook default do codificador: delega ao to_json especializado do ator."""
+    return obj.to_json()
 
-    return id_to_resource_map, updated_items
+
+def _write_bucket(resource_id: str, actors: List[Any], base_filename: str,
+                  output_dir: Path, pretty: bool, use_gzip: bool) -> Optional[Tuple[Dict[str, str], int]]:
+    """
+    Serializa e grava um bucket (um arquivo) de atores. Em escopo de módulo
+    para ser picklable pelos workers do ProcessPoolExecutor. Retorna o info do
+    arquivo e o número de atores gravados, ou None em caso de falha.
+    """
+    file_index = resource_id.rsplit(';', 1)[-1]
+    filename = f"{base_filename}_{file_index}"
+    filepath = output_dir / filename
+    try:
+        # O hook default converte cada ator dentro do passo de codificação,
+        # sem materializar a lista de dicts
+        save_json_stream(actors, filepath, pretty, use_gzip, default=_to_json_default)
+        final_filename = f"{filename}{'.json.gz' if use_gzip else '.json'}"
+        # Lazy %: resumo único em INFO fica no split_and_save
+        logger.debug("Salvo arquivo %s com %d atores.", final_filename, len(actors))
+        return {"resource_id": resource_id, "filename": final_filename}, len(actors)
+    except Exception as e:
+        logger.error(f"Falha ao salvar o arquivo {filename}: {e}")
+        # Decide se quer parar ou continuar
+        # raise
+        return None
 
 
 def split_and_save(
-    actors: List[Any], # Lista de NodeActor, LinkActor ou CarActor com resource_id preenchido
+    actors: Iterable[Any], # NodeActor, LinkActor ou CarActor com resource_id preenchido
     base_filename: str, # "nodes", "links", "cars"
     output_dir: Path,
     pretty: bool,
-    use_gzip: bool
+    use_gzip: bool,
+    workers: int = 1
 ) -> List[Dict[str, str]]:
     """
-    Divide a lista de atores com base no resource_id e salva em arquivos JSON.
-    Retorna uma lista de dicionários com informações sobre os arquivos gerados.
+    Salva os atores em arquivos JSON agrupados por resource_id, de forma
+    incremental: aceita qualquer iterável (inclusive geradores) e mantém em
+    memória apenas o chunk do arquivo corrente, descarregando-o assim que o
+    resource_id muda. Pressupõe que os atores chegam já agrupados por
+    resource_id — a atribuição sequencial de resource_ids garante isso.
+
+    No modo sequencial cada ator é escrito direto no arquivo aberto do bucket
+    corrente (memória O(1)); com workers > 1 o bucket é bufferizado e
+    serializado/comprimido em um processo do pool (os arquivos são
+    independentes, então as escritas não compartilham estado), com no máximo
+    workers * 2 buckets em voo. Retorna uma lista de dicionários com
+    informações sobre os arquivos gerados.
     """
     logger.info(f"Iniciando divisão e salvamento para: {base_filename}")
-    files_info = []
-    # Agrupa atores pelo resource_id atribuído
-    grouped_actors: Dict[str, List[Any]] = {}
+    files_info: List[Dict[str, str]] = []
+    buffer: List[Any] = []
+    writer: Optional[JsonArrayWriter] = None
+    current_resource_id: Optional[str] = None
+    total_actors = 0
+    executor = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+    futures = []
+    max_pending = workers * 2
+
+    def _collect_oldest():
+        # Consome o futuro mais antigo (ordem de submissão mantém files_info
+        # ordenado); buckets que falharam ficam de fora do resumo
+        nonlocal total_actors
+        result = futures.pop(0).result()
+        if result is not None:
+            info, count = result
+            files_info.append(info)
+            total_actors += count
+
+    def _finish_bucket():
+        nonlocal writer, total_actors
+        if executor is not None:
+            # Backpressure: sem este limite, cada bucket pendente mantém sua
+            # lista de atores viva e a memória cresce para O(total de atores)
+            # quando o gerador produz mais rápido do que o pool grava
+            while len(futures) >= max_pending:
+                _collect_oldest()
+            futures.append(executor.submit(
+                _write_bucket, current_resource_id, list(buffer),
+                base_filename, output_dir, pretty, use_gzip
+            ))
+            buffer.clear()
+        elif writer is not None:
+            filename = f"{base_filename}_{current_resource_id.rsplit(';', 1)[-1]}"
+            try:
+                writer.close()
+                total_actors += writer.count
+                final_filename = f"{filename}{'.json.gz' if use_gzip else '.json'}"
+                files_info.append({"resource_id": current_resource_id, "filename": final_filename})
+                # Lazy %: em DEBUG desligado, nem a formatação roda — a 100k+
+                # buckets o log por arquivo dominava o tempo de salvamento
+                logger.debug("Salvo arquivo %s com %d atores.", final_filename, writer.count)
+            except Exception as e:
+                logger.error(f"Falha ao salvar o arquivo {filename}: {e}")
+            writer = None
+
     for actor in actors:
-        if actor.resource_id:
-            if actor.resource_id not in grouped_actors:
-                grouped_actors[actor.resource_id] = []
-            grouped_actors[actor.resource_id].append(actor)
-        else:
+        resource_id = actor.resource_id
+        if not resource_id:
             logger.warning(f"Ator {actor.id} sem resource_id, não será salvo.")
+            continue
+        if resource_id != current_resource_id:
+            if current_resource_id is not None:
+                _finish_bucket()
+            current_resource_id = resource_id
+            if executor is None:
+                filename = f"{base_filename}_{resource_id.rsplit(';', 1)[-1]}"
+                try:
+                    writer = JsonArrayWriter(output_dir / filename, pretty, use_gzip,
+                                             default=_to_json_default)
+                except Exception as e:
+                    # Mesmo contrato do _write_bucket: loga e segue para os
+                    # próximos buckets; este fica de fora de files_info
+                    logger.error(f"Falha ao salvar o arquivo {filename}: {e}")
+                    writer = None
+        if executor is not None:
+            buffer.append(actor)
+        elif writer is not None:
+            try:
+                writer.write(actor)
+            except Exception as e:
+                filename = f"{base_filename}_{current_resource_id.rsplit(';', 1)[-1]}"
+                logger.error(f"Falha ao salvar o arquivo {filename}: {e}")
+                try:
+                    writer.close()
+                except Exception:
+                    pass
+                # Abandona o restante do bucket e continua nos próximos
+                writer = None
+    if current_resource_id is not None:
+        _finish_bucket()
+
+    if executor is not None:
+        while futures:
+            _collect_oldest()
+        executor.shutdown()
 
-    # Ordena pelos resource_ids para garantir a numeração correta dos arquivos (ex: node;1, node;2)
-    sorted_resource_ids = sorted(grouped_actors.keys(), key=lambda x: int(x.split(';')[-1]))
-
-    for resource_id in sorted_resource_ids:
-        chunk = grouped_actors[resource_id]
-        file_index = resource_id.split(';')[-1]
-        filename = f"{base_filename}_{file_index}"
-        filepath = output_dir / filename
-        # Converte para dict antes de salvar, removendo campos nulos/auxiliares
-        data_to_save = [to_dict(actor) for actor in chunk]
-        try:
-            save_json(data_to_save, filepath, pretty, use_gzip)
-            final_filename = f"{filename}{'.json.gz' if use_gzip else '.json'}"
-            files_info.append({"resource_id": resource_id, "filename": final_filename})
-            logger.info(f"Salvo arquivo {final_filename} com {len(chunk)} atores.")
-        except Exception as e:
-            logger.error(f"Falha ao salvar o arquivo {filename}: {e}")
-            # Decide se quer parar ou continuar
-            # raise
-
-    logger.info(f"Finalizado salvamento para {base_filename}. Gerados {len(files_info)} arquivos.")
+    logger.info(f"Finalizado salvamento para {base_filename}. Gerados {len(files_info)} arquivos com {total_actors} atores.")
     return files_info
\ No newline at end of file
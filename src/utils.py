@@ -1,9 +1,23 @@
+import functools
+import itertools
 import json
 import gzip
 import logging
 import os
+import sys
 from pathlib import Path
-from typing import Any, List
+from typing import Any, Iterable, Iterator, List
+
+try:
+    import orjson  # C-level JSON encoder, much faster on the large actor batches
+except ImportError:
+    orjson = None
+
+try:
+    # ISA-L SIMD deflate; the threaded variant also overlaps compression with I/O
+    from isal import igzip_threaded
+except ImportError:
+    igzip_threaded = None
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
@@ -22,29 +36,133 @@ def save_json(data: Any, filepath: Path, pretty: bool, use_gzip: bool):
     final_path = filepath.with_suffix('.json.gz' if use_gzip else '.json')
     logger.debug(f"Saving file to: {final_path}")
     try:
+        if orjson is not None:
+            # orjson emits bytes directly (no intermediate str + encode step)
+            payload = orjson.dumps(data, option=orjson.OPT_INDENT_2 if pretty else 0)
+        else:
+            payload = json.dumps(data, indent=4 if pretty else None, ensure_ascii=False).encode('utf-8')
         if use_gzip:
-            with gzip.open(final_path, 'wt', encoding='utf-8') as f:
-                json.dump(data, f, indent=4 if pretty else None, ensure_ascii=False)
+            with _gzip_open_fast(final_path) as f:
+                f.write(payload)
         else:
-            with open(final_path, 'w', encoding='utf-8') as f:
-                json.dump(data, f, indent=4 if pretty else None, ensure_ascii=False)
+            # Single whole-payload write: raw fd, no BufferedWriter/TextIOWrapper
+            fd = os.open(os.fspath(final_path), os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+            try:
+                os.write(fd, payload)
+            finally:
+                os.close(fd)
         logger.debug(f"File successfully saved: {final_path}")
     except (IOError, TypeError) as e:
         logger.error(f"Error saving file {final_path}: {e}")
         raise
 
+def _gzip_open_fast(final_path: Path):
+    """Opens a gzip file for binary writing with the fastest available codec.
+
+    isal's level 1 compresses roughly like zlib's but several times faster;
+    when isal is missing, stdlib gzip at level 1 is the next best trade-off.
+    """
+    if igzip_threaded is not None:
+        return igzip_threaded.open(final_path, 'wb', compresslevel=1, threads=1)
+    return gzip.open(final_path, 'wb', compresslevel=1)
+
+class JsonArrayWriter:
+    """Incrementally writes a JSON array to a file, one object at a time.
+
+    Only the object being written is ever in memory: each write() encodes the
+    object (orjson when available, stdlib json otherwise) and appends it to
+    the open — optionally gzip — file handle with the right separators.
+
+    default, when given, is passed to the encoder so objects it does not know
+    natively (the actor dataclasses) are converted inside the encoding pass
+    instead of in a separate Python-level conversion loop.
+    """
+
+    def __init__(self, filepath: Path, pretty: bool, use_gzip: bool, default=None):
+        self.final_path = filepath.with_suffix('.json.gz' if use_gzip else '.json')
+        self.pretty = pretty
+        self.default = default
+        self.count = 0
+        if use_gzip:
+            # Level 1 is ~3x faster than the default 9 at a minor size cost
+            self._file = _gzip_open_fast(self.final_path)
+        else:
+            self._file = open(self.final_path, 'wb')
+        self._file.write(b'[\n' if pretty else b'[')
+
+    def write(self, obj: Any):
+        if self.count:
+            self._file.write(b',\n' if self.pretty else b',')
+        if orjson is not None:
+            option = orjson.OPT_INDENT_2 if self.pretty else 0
+            if self.default is not None:
+                # Without passthrough orjson walks dataclasses itself, field by
+                # field, and the default hook is never consulted
+                option |= orjson.OPT_PASSTHROUGH_DATACLASS
+            payload = orjson.dumps(obj, option=option, default=self.default)
+        else:
+            payload = json.dumps(obj, indent=2 if self.pretty else None, ensure_ascii=False,
+                                 default=self.default).encode('utf-8')
+        self._file.write(payload)
+        self.count += 1
+
+    def close(self):
+        self._file.write(b'\n]' if self.pretty else b']')
+        self._file.close()
+        logger.debug(f"File successfully saved: {self.final_path}")
+
+
+def save_json_stream(items, filepath: Path, pretty: bool, use_gzip: bool, default=None):
+    """Saves an iterable of items as a JSON array, one item at a time.
+
+    Fuses conversion and encoding via JsonArrayWriter: each item is written
+    individually (converted via the encoder's default hook, if given), so the
+    full list of dicts and the full output string never exist at once.
+    """
+    logger.debug(f"Saving file to: {filepath}")
+    try:
+        writer = JsonArrayWriter(filepath, pretty, use_gzip, default)
+        for item in items:
+            writer.write(item)
+        writer.close()
+    except (IOError, TypeError) as e:
+        logger.error(f"Error saving file {filepath}: {e}")
+        raise
+
 def generate_resource_id(prefix: str, index: int) -> str:
-    """Generates a resource ID in DTMI format."""
-    return f"{prefix}{index}"
+    """Generates a resource ID in DTMI format.
+
+    Interned like the actor ids: each resource id is shared by up to
+    max_per_file actors, so duplicates collapse to one object.
+    """
+    return sys.intern(f"{prefix}{index}")
 
+# Replaces characters that could break DTMI in one C-level pass (vs two
+# .replace() scans, each allocating a temp string)
+_SAFE_TABLE = str.maketrans({";": "_", ":": "_"})
+
+@functools.lru_cache(maxsize=None)
 def generate_actor_id(prefix: str, original_id: str) -> str:
-    """Generates an actor ID in DTMI format."""
+    """Generates an actor ID in DTMI format.
+
+    Pure and deterministic, and called more than once per entity (assignment,
+    construction, dependency resolution), so results are memoized. The return
+    is interned so the ids hash/compare by pointer in the lookup dicts.
+    """
     # Ensures the original ID does not contain characters that could break DTMI (optional but safe)
-    safe_original_id = str(original_id).replace(";", "_").replace(":", "_")
-    return f"{prefix}{safe_original_id}"
+    return sys.intern(prefix + str(original_id).translate(_SAFE_TABLE))
+
+def chunk_iter(data: Iterable[Any], chunk_size: int) -> Iterator[List[Any]]:
+    """Yields chunks with a maximum size of chunk_size, one at a time.
 
-def chunk_list(data: List[Any], chunk_size: int) -> List[List[Any]]:
-    """Splits a list into chunks with a maximum size of chunk_size."""
+    Unlike slicing the whole input into a list of lists up front, only the
+    chunk being consumed is materialized, so peak memory stays O(chunk_size).
+    """
+    it = iter(data)
     if chunk_size <= 0:
-        return [data]  # Returns the entire list if the chunk size is invalid
-    return [data[i:i + chunk_size] for i in range(0, len(data), chunk_size)]
+        chunk = list(it)  # Yields the entire input if the chunk size is invalid
+        if chunk:
+            yield chunk
+        return
+    while chunk := list(itertools.islice(it, chunk_size)):
+        yield chunk